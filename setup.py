@@ -14,13 +14,15 @@ setup(
     author="Jacob Gelling",
     package_dir={"": "src"},
     packages=find_packages(where="src"),
-    python_requires=">=3.7, <4",
+    python_requires=">=3.10, <4",
     install_requires=[
         "openai>=0.28,<1",
+        "aiohttp",
         "asyncio",
         "browser_cookie3",
         "python-gemini-api>=2.4",
         "EdgeGPT @ https://github.com/jacobgelling/EdgeGPT/archive/refs/tags/0.14.1.zip",
+        "orjson",
         "requests",
         "tqdm",
     ],
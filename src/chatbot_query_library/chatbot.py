@@ -1,13 +1,14 @@
 #!/usr/bin/env python
 """Provides common classes for accessing numerous chatbots."""
 
-import openai
 import requests
+import aiohttp
 from .cookies import CookieManager
-from gemini import Gemini as GeminiAPI
-import EdgeGPT.EdgeGPT as EdgeGPT
 import asyncio
 
+# The openai, gemini and EdgeGPT backends are imported lazily by the classes
+# that need them, as importing them all costs hundreds of milliseconds
+
 class _Chatbot:
     def __init__(self):
         pass
@@ -25,10 +26,14 @@ class _UnofficialChatbot(_Chatbot):
         """Kill the cookie file."""
         self.cookie_manager.kill_cookie_file()
 
+# OpenAI models using the legacy completion endpoint rather than chat completion
+_COMPLETION_MODELS = ["davinci", "curie", "babbage", "ada", "text-ada-001", "text-babbage-001", "text-curie-001"]
+
 class OpenAI(_Chatbot):
     def __init__(self, api_key: str, name: str = "GPT-3.5", model: str = "gpt-3.5-turbo", timeout: int = 60, temperature: float = 1.0, max_tokens: int = 2048):
         """Initialise OpenAI, with defaults set to GPT-3.5."""
         super().__init__()
+        import openai
         openai.api_key = api_key
         self.name = name
         self.model = model
@@ -38,7 +43,8 @@ class OpenAI(_Chatbot):
 
     def query(self, prompt: str) -> str:
         """Generate a response based on the provided prompt."""
-        if self.model in ["davinci", "curie", "babbage", "ada", "text-ada-001", "text-babbage-001", "text-curie-001"]:
+        import openai
+        if self.model in _COMPLETION_MODELS:
             openai_response = openai.Completion.create(
                 engine=self.model,
                 prompt=prompt,
@@ -57,52 +63,125 @@ class OpenAI(_Chatbot):
             )
             return chat_completion.choices[0].message.content
 
+    async def aquery(self, prompt: str) -> str:
+        """Generate a response based on the provided prompt without blocking the event loop."""
+        import openai
+        if self.model in _COMPLETION_MODELS:
+            openai_response = await openai.Completion.acreate(
+                engine=self.model,
+                prompt=prompt,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                request_timeout=self.timeout
+            )
+            return openai_response.choices[0].text
+        else:
+            chat_completion = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                request_timeout=self.timeout
+            )
+            return chat_completion.choices[0].message.content
+
+# Mapping of EdgeGPT conversation style names to their display names
+_STYLE_NAMES = {
+    "balanced": "Balanced",
+    "precise": "Precise",
+    "creative": "Creative",
+}
+
 class Copilot(_UnofficialChatbot):
-    def __init__(self, cookie_manager: CookieManager = CookieManager(domain_name="bing.com"), name: str = "Copilot", timeout: int = 60, temperature: EdgeGPT.ConversationStyle = EdgeGPT.ConversationStyle.balanced):
-        """Initialise Copilot."""
+    def __init__(self, cookie_manager: CookieManager = None, name: str = "Copilot", timeout: int = 60, temperature: "EdgeGPT.ConversationStyle" = None):
+        """Initialise Copilot, defaulting to the balanced conversation style."""
         super().__init__()
-        self.cookie_manager = cookie_manager
+        import EdgeGPT.EdgeGPT as EdgeGPT
+        self.cookie_manager = cookie_manager if cookie_manager is not None else CookieManager(domain_name="bing.com")
         self.name = name
         self.timeout = timeout
-        self.temperature = temperature
+        self.temperature = temperature if temperature is not None else EdgeGPT.ConversationStyle.balanced
+        self._bot_cache: dict = {}
+
+    def kill_cookie_file(self) -> None:
+        """Kill the cookie file and close its cached bot."""
+        bot = self._bot_cache.pop(self.cookie_manager.current_cookie_file, None)
+        if bot is not None:
+            self._close_bot(bot)
+        super().kill_cookie_file()
+
+    def _close_bot(self, bot) -> None:
+        """Close a bot's network resources, scheduling the close if a loop is running."""
+        try:
+            asyncio.get_running_loop().create_task(bot.close())
+        except RuntimeError:
+            asyncio.run(bot.close())
+
+    async def aclose(self) -> None:
+        """Close all cached bots and clear the cache.
+
+        Bots are bound to the event loop they were created on, so this must be
+        awaited before the loop closes."""
+        for bot in self._bot_cache.values():
+            await bot.close()
+        self._bot_cache.clear()
 
     def temperature_to_string(self) -> str :
         """Convert the temperature attribute to a string."""
-        if self.temperature == EdgeGPT.ConversationStyle.balanced:
-            return "Balanced"
-        elif self.temperature == EdgeGPT.ConversationStyle.precise:
-            return "Precise"
-        elif self.temperature == EdgeGPT.ConversationStyle.creative:
-            return "Creative"
+        return _STYLE_NAMES.get(self.temperature.name)
 
-    def query(self, prompt: str) -> str:
-        """Generate a response based on the provided prompt."""
-        # Rotate the cookie file and get the cookies
+    async def aquery(self, prompt: str) -> str:
+        """Generate a response based on the provided prompt without blocking the event loop."""
+        import EdgeGPT.EdgeGPT as EdgeGPT
+
+        # Rotate the cookie file
         self.rotate_cookie_file()
-        cookie_list = self.cookie_manager.get_cookie_list()
-        
-        # Return the response
-        async def query_with_timeout(prompt: str, timeout: int):
+        cookie_file = self.cookie_manager.current_cookie_file
+
+        # Reuse the cached bot for this cookie file, creating it on first use
+        bot = self._bot_cache.get(cookie_file)
+        if bot is None:
+            cookie_list = self.cookie_manager.get_cookie_list()
             bot = await EdgeGPT.Chatbot.create(cookies=cookie_list)
-            response = await asyncio.wait_for(
-                bot.ask(prompt=prompt, conversation_style=self.temperature, simplify_response=True),
-                timeout=timeout
-            )
-            return response["text"]
-        answer = asyncio.run(query_with_timeout(prompt, self.timeout))
-        return answer
+            self._bot_cache[cookie_file] = bot
+        else:
+            await bot.reset()
+
+        # Return the response
+        response = await asyncio.wait_for(
+            bot.ask(prompt=prompt, conversation_style=self.temperature, simplify_response=True),
+            timeout=self.timeout
+        )
+        return response["text"]
+
+    def query(self, prompt: str) -> str:
+        """Generate a response based on the provided prompt."""
+        # Run the query on a new event loop, unless one is already running
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Close the cached bots before the loop does, as they cannot be reused on a later loop
+            async def query_and_close(prompt: str):
+                try:
+                    return await self.aquery(prompt)
+                finally:
+                    await self.aclose()
+            return asyncio.run(query_and_close(prompt))
+        raise RuntimeError("Copilot.query cannot be called from a running event loop, await aquery instead.")
 
 class Gemini(_UnofficialChatbot):
-    def __init__(self, cookie_manager: CookieManager = CookieManager(domain_name="google.com"), name: str = "Gemini", timeout: int = 60):
+    def __init__(self, cookie_manager: CookieManager = None, name: str = "Gemini", timeout: int = 60):
         """Initialise Gemini."""
         super().__init__()
-        self.cookie_manager = cookie_manager
+        self.cookie_manager = cookie_manager if cookie_manager is not None else CookieManager(domain_name="google.com")
         self.name = name
         self.timeout = timeout
         self.temperature = None
 
     def query(self, prompt: str) -> str:
         """Generate a response based on the provided prompt."""
+        from gemini import Gemini as GeminiAPI
+
         # Rotate the cookie file and get the cookies
         self.rotate_cookie_file()
         cookie_dict = self.cookie_manager.get_cookie_dict()
@@ -113,7 +192,7 @@ class Gemini(_UnofficialChatbot):
         return answer
 
 class HuggingFace(_Chatbot):
-    def __init__(self, api_key: str, name: str = "Llama 2", model: str = "meta-llama/Llama-2-70b-chat-hf", timeout: int = 60, temperature: float = 0.6, max_tokens: int = 2048, top_p: float = 0.9, top_k: int = 0):
+    def __init__(self, api_key: str, name: str = "Llama 2", model: str = "meta-llama/Llama-2-70b-chat-hf", timeout: int = 60, temperature: float = 0.6, max_tokens: int = 2048, top_p: float = 0.9, top_k: int = 0, session: aiohttp.ClientSession = None):
         """Initialise Hugging Face, with defaults set to Llama 2."""
         super().__init__()
         self.api_key = api_key
@@ -124,11 +203,16 @@ class HuggingFace(_Chatbot):
         self.max_tokens = max_tokens
         self.top_p = top_p
         self.top_k = top_k
+        self._session = session
+        self._owns_session = False
 
-    def query(self, prompt: str) -> str:
-        """Generate a response based on the provided prompt."""
-        api_url = f"https://api-inference.huggingface.co/models/{self.model}"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
+        # Reuse one connection pool across queries to avoid a TCP + TLS handshake per call
+        self._requests_session = requests.Session()
+        self._requests_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+        self._requests_session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def _request_data(self, prompt: str) -> dict:
+        """Build the JSON payload for the provided prompt."""
         if self.model == "meta-llama/Llama-2-70b-chat-hf":
             system_prompt = "You are a helpful, respectful and honest assistant. Always answer as helpfully as possible, while being safe. Your answers should not include any harmful, unethical, racist, sexist, toxic, dangerous, or illegal content. Please ensure that your responses are socially unbiased and positive in nature.\n\nIf a question does not make any sense, or is not factually coherent, explain why instead of answering something not correct. If you don't know the answer to a question, please don't share false information."
             complete_prompt = f"<s>[INST] <<SYS>>\n{system_prompt}\n<</SYS>>\n\n{prompt} [/INST]"
@@ -149,12 +233,49 @@ class HuggingFace(_Chatbot):
                 "wait_for_model": True,
             },
         }
-        response = requests.request("POST", api_url, headers=headers, json=data, timeout=self.timeout).json()
-        
-        # Check response for errors
+        return data
+
+    def _check_response(self, response) -> str:
+        """Check the response for errors and return the generated text."""
         if len(response) == 0:
             raise Exception("No response.")
         elif "error" in response:
             raise Exception(response["error"])
         else:
             return response[0]["generated_text"]
+
+    def query(self, prompt: str) -> str:
+        """Generate a response based on the provided prompt."""
+        api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        data = self._request_data(prompt)
+        response = self._requests_session.post(api_url, json=data, timeout=self.timeout).json()
+        return self._check_response(response)
+
+    async def aquery(self, prompt: str) -> str:
+        """Generate a response based on the provided prompt without blocking the event loop."""
+        api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        data = self._request_data(prompt)
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+            self._owns_session = True
+        async with self._session.post(api_url, headers=headers, json=data, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+            return self._check_response(await response.json())
+
+    async def aclose(self) -> None:
+        """Close the automatically created aiohttp session, if any.
+
+        Sessions are bound to the event loop they were created on, so this must
+        be awaited before the loop closes. A session passed to __init__ is left
+        for its owner to close."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._owns_session = False
+
+    def close(self) -> None:
+        """Close the underlying HTTP session."""
+        self._requests_session.close()
+
+    def __del__(self):
+        self.close()
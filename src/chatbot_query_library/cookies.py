@@ -1,31 +1,47 @@
 #!/usr/bin/env python
 """Provides methods for managing cookies from browsers."""
 
+import operator
 import platform
+from collections import deque
 from typing import Callable
 from http.cookiejar import CookieJar
 import browser_cookie3
 import os
 
+# Batch the per-cookie attribute reads used by get_cookie_list into one C-level getter
+_COOKIE_ATTRS = operator.attrgetter("domain", "expires", "domain_initial_dot", "_rest", "name", "path", "secure", "discard", "value")
+
 class CookieManager:
     def __init__(self, domain_name: str = "", prefix: str = None, browser: Callable = browser_cookie3.edge, cookie_files: list = None):
         self.domain_name = domain_name
         self.prefix = prefix
         self.browser = browser
         if browser == browser_cookie3.edge and not cookie_files:
-            self.cookie_files = generate_edge_cookie_files()
-        else:
-            self.cookie_files = cookie_files
-        self.current_cookie_file = self.cookie_files[0] if self.cookie_files else None
+            cookie_files = generate_edge_cookie_files()
+        self.cookie_files = deque(cookie_files or [])
+        self._cookie_cache: dict = {}
 
-    def get_cookie_dict(self) -> dict:
-        """Get cookies from the specified browser for the given domain and optional prefix."""
+    @property
+    def current_cookie_file(self) -> str:
+        """The cookie file currently in use."""
+        return self.cookie_files[0] if self.cookie_files else None
+
+    def _load(self) -> list:
+        """Load cookies for the current cookie file and domain, caching the parsed result."""
         if not self.current_cookie_file:
             raise Exception("No current cookie file.")
 
+        key = (self.current_cookie_file, self.domain_name)
+        if key not in self._cookie_cache:
+            self._cookie_cache[key] = list(self.browser(domain_name=self.domain_name, cookie_file=self.current_cookie_file))
+        return self._cookie_cache[key]
+
+    def get_cookie_dict(self) -> dict:
+        """Get cookies from the specified browser for the given domain and optional prefix."""
         cookie_dict = {
             cookie.name: cookie.value
-            for cookie in self.browser(domain_name=self.domain_name, cookie_file=self.current_cookie_file)
+            for cookie in self._load()
             if not self.prefix or cookie.name.startswith(self.prefix)
         }
         return cookie_dict
@@ -38,51 +54,46 @@ class CookieManager:
     def get_cookie_jar(self) -> CookieJar:
         """Get cookies from the specified browser for the given domain and optional prefix as a CookieJar.
         """
-        if not self.current_cookie_file:
-            raise Exception("No current cookie file.")
-
         cookie_jar = CookieJar()
-        for cookie in self.browser(domain_name=self.domain_name, cookie_file=self.current_cookie_file):
+        for cookie in self._load():
             if not self.prefix or cookie.name.startswith(self.prefix):
                 cookie_jar.set_cookie(cookie)
         return cookie_jar
-    
+
     def get_cookie_list(self) -> list:
         """Get cookies from the specified browser for the given domain and optional prefix as a list.
         """
-        if not self.current_cookie_file:
-            raise Exception("No current cookie file.")
-
-        cookie_list = [
-            {
-                "domain": cookie.domain,
-                "expirationDate": float(cookie.expires) if cookie.expires else None,
-                "hostOnly": not cookie.domain_initial_dot,
-                "httpOnly": "HTTPOnly" in cookie._rest,
-                "name": cookie.name,
-                "path": cookie.path,
+        cookie_list = []
+        for cookie in self._load():
+            if self.prefix and not cookie.name.startswith(self.prefix):
+                continue
+            domain, expires, domain_initial_dot, rest, name, path, secure, discard, value = _COOKIE_ATTRS(cookie)
+            cookie_list.append({
+                "domain": domain,
+                "expirationDate": float(expires) if expires else None,
+                "hostOnly": not domain_initial_dot,
+                "httpOnly": "HTTPOnly" in rest,
+                "name": name,
+                "path": path,
                 "sameSite": "no_restriction",
-                "secure": bool(cookie.secure),
-                "session": cookie.discard,
+                "secure": bool(secure),
+                "session": discard,
                 "storeId": None,
-                "value": cookie.value,
-            }
-            for cookie in self.browser(domain_name=self.domain_name, cookie_file=self.current_cookie_file)
-            if not self.prefix or cookie.name.startswith(self.prefix)
-        ]
+                "value": value,
+            })
         return cookie_list
-    
+
     def rotate_cookie_file(self) -> None:
         """Rotate the list of cookie files, selecting the next one as the current cookie file."""
-        if self.cookie_files and len(self.cookie_files) > 1:
-            self.cookie_files = self.cookie_files[1:] + self.cookie_files[:1]
-            self.current_cookie_file = self.cookie_files[0]
+        if len(self.cookie_files) > 1:
+            self._cookie_cache.pop((self.current_cookie_file, self.domain_name), None)
+            self.cookie_files.rotate(-1)
 
     def kill_cookie_file(self) -> None:
         """Remove the current cookie file from the list of cookie files."""
-        if self.cookie_files and len(self.cookie_files) > 1:
-            self.cookie_files = self.cookie_files[1:]
-            self.current_cookie_file = self.cookie_files[0]
+        if len(self.cookie_files) > 1:
+            self._cookie_cache.pop((self.current_cookie_file, self.domain_name), None)
+            self.cookie_files.popleft()
         else:
             raise Exception("Cannot kill the last cookie file.")
 
@@ -106,11 +117,12 @@ def generate_edge_cookie_files(default_profile: bool = False) -> list:
         raise Exception(f"Directory {dir1} does not exist.")
     
     # Get profile cookie files
-    cookie_files = [
-        os.path.join(dir1, folder, dir2)
-        for folder in os.listdir(dir1)
-        if folder.startswith("Profile ")
-    ]
+    with os.scandir(dir1) as entries:
+        cookie_files = [
+            os.path.join(entry.path, dir2)
+            for entry in entries
+            if entry.name.startswith("Profile ") and entry.is_dir()
+        ]
 
     # Add the default profile cookie file
     default_cookie_file = os.path.join(dir1, "Default", dir2)
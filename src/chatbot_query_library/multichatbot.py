@@ -3,16 +3,15 @@
 
 import asyncio
 import os
+from collections import Counter
 from .chatbot import _Chatbot, _UnofficialChatbot, Copilot, Gemini, OpenAI, HuggingFace
-from multiprocessing import Process
-import json
+import orjson
 from tqdm import tqdm
 import time
 import random
-import EdgeGPT.EdgeGPT as EdgeGPT
 
 class MultiChatbot:
-    def __init__(self, chatbots: list, prompts: list, temp_dir: str = "temp", output_dir: str = "output", output_filename: str = "results.json", runs: int = 1, max_errors: int = 5):
+    def __init__(self, chatbots: list, prompts: list, temp_dir: str = "temp", output_dir: str = "output", output_filename: str = "results.jsonl", runs: int = 1, max_errors: int = 5, max_concurrency: int = 8):
         self.chatbots = chatbots
         self.prompts = prompts
         self.temp_dir = temp_dir
@@ -20,6 +19,7 @@ class MultiChatbot:
         self.output_filename = output_filename
         self.runs = runs
         self.max_errors = max_errors
+        self.max_concurrency = max_concurrency
 
     def query(self):
         """Query the chatbots in parallel."""
@@ -28,36 +28,41 @@ class MultiChatbot:
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Create processes array to run each chatbot query in parallel
-        processes = []
-        for chatbot in self.chatbots:
-            processes.append(Process(target=self._query_chatbot, args=(chatbot, len(processes))))
-
-        # Start each process
-        for process in processes:
-            process.start()
-        
-        # Wait for each process to finish
-        for process in processes:
-            process.join()
-
-        # If the output file already exists, load it
+        # If the output file already exists, load it once for all chatbots
         results = []
-        if os.path.exists(os.path.join(self.output_dir, self.output_filename)):
-            with open(os.path.join(self.output_dir, self.output_filename), "r") as f:
-                results = json.load(f)
-
-        # Combine all temp files into results
+        output_filename = os.path.join(self.output_dir, self.output_filename)
+        if os.path.exists(output_filename):
+            with open(output_filename, "r") as f:
+                results = [orjson.loads(line) for line in f]
+
+        # Query each chatbot concurrently on the event loop
+        asyncio.run(self._query_chatbots(results))
+
+        # Append each temp file to the output file without re-parsing it
+        with open(output_filename, "ab") as f:
+            for chatbot in self.chatbots:
+                temp_filename = self._temp_filename(chatbot)
+                if os.path.exists(temp_filename):
+                    with open(temp_filename, "rb") as temp_file:
+                        f.writelines(temp_file)
+                    os.remove(temp_filename)
+
+    async def _query_chatbots(self, results: list) -> None:
+        """Query each chatbot as a coroutine, each under its own concurrency cap."""
+        errors = await asyncio.gather(*[
+            self._query_chatbot(chatbot, index, [result for result in results if result["chatbot"] == chatbot.name])
+            for index, chatbot in enumerate(self.chatbots)
+        ], return_exceptions=True)
+
+        # Log failures so one failed chatbot does not discard the others' results
+        for chatbot, error in zip(self.chatbots, errors):
+            if isinstance(error, Exception):
+                self._log_error(error, chatbot)
+
+        # Close any sessions the chatbots opened on this event loop
         for chatbot in self.chatbots:
-            temp_filename = self._temp_filename(chatbot)
-            if os.path.exists(temp_filename):
-                with open(temp_filename, "r") as f:
-                    results += json.load(f)
-                os.remove(temp_filename)
-        
-        # Write results to output file
-        with open(os.path.join(self.output_dir, self.output_filename), "w") as f:
-            f.write(json.dumps(results))
+            if hasattr(chatbot, "aclose"):
+                await chatbot.aclose()
 
     def _temp_filename(self, chatbot: _Chatbot) -> str:
         """Return the temp filename for the chatbot.
@@ -67,114 +72,154 @@ class MultiChatbot:
             
         Returns:
             str: Temp filename."""
-        return os.path.join(self.temp_dir, chatbot.name.lower() + ".json")
+        return os.path.join(self.temp_dir, chatbot.name.lower() + ".jsonl")
     
     def _log_error(self, ex: Exception | str, chatbot: _Chatbot) -> None:
         """Log an error to the chatbot's log file."""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+        errors = [ex] if type(ex) is str else ex.args
         with open(os.path.join(self.temp_dir, chatbot.name.lower() + ".log"), "a") as f:
-            if type(ex) is str:
-                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}: {ex}\n")
-            else:
-                for error in ex.args:
-                    f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}: {error}\n")
+            f.writelines(f"{timestamp}: {error}\n" for error in errors)
 
-    def _query_chatbot(self, chatbot: _Chatbot, progress_bar_index: int = None) -> None:
+    async def _query_chatbot(self, chatbot: _Chatbot, progress_bar_index: int = None, results: list = None) -> None:
         """
-        Query the specified chatbot.
+        Query the specified chatbot, given its existing results from the output file.
         """
+        results = results or []
+
+        # Unofficial APIs must be serialised per chatbot, official APIs get the full concurrency cap
+        semaphore = asyncio.Semaphore(1 if isinstance(chatbot, _UnofficialChatbot) else self.max_concurrency)
 
         # If the temp file exists, load it
         temp_filename = self._temp_filename(chatbot)
         temp_results = []
         if os.path.exists(temp_filename):
             with open(temp_filename, "r") as f:
-                temp_results = json.load(f)
+                temp_results = [orjson.loads(line) for line in f]
+
+        # Resolve the temperature field once, it does not change between runs
+        temperature = chatbot.temperature_to_string() if isinstance(chatbot, Copilot) else chatbot.temperature
+
+        # Count responses per prompt for this chatbot in both temp and output files
+        temp_counts = Counter(result["prompt"] for result in temp_results)
+        results_counts = Counter(result["prompt"] for result in results)
 
-        # If the output file already exists, load it
-        results = []
-        if os.path.exists(os.path.join(self.output_dir, self.output_filename)):
-            with open(os.path.join(self.output_dir, self.output_filename), "r") as f:
-                results = json.load(f)
-        
         # Create progress bar
         initial = 0
         for prompt in self.prompts:
-            # Count responses for this chatbot in both temp and output files
-            temp_count = sum(1 for result in temp_results if result["prompt"] == prompt)
-            results_count = sum(1 for result in results if result["prompt"] == prompt and result["chatbot"] == chatbot.name)
-            
             # Add the minimum of the counts and runs to initial progress bar value
-            initial += min(temp_count, self.runs) + min(results_count, self.runs)
+            initial += min(temp_counts[prompt], self.runs) + min(results_counts[prompt], self.runs)
         progress_bar = tqdm(initial=initial, total=len(self.prompts) * self.runs, position=progress_bar_index, desc=chatbot.name)
 
-        # For each prompt
+        # One writer per chatbot preserves the append order of the temp file
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(self._write_results(temp_filename, queue, progress_bar, chatbot))
+
+        # Shared error state so concurrent runs back off together
+        error_state = {"count": 0}
+
+        # Launch one task per outstanding (prompt, run) pair
+        tasks = []
         for prompt in self.prompts:
-            # Count responses for this chatbot and prompt in both temp and output files
-            prompt_runs = min(sum(1 for result in temp_results if result["prompt"] == prompt), self.runs) + min(sum(1 for result in results if result["prompt"] == prompt and result["chatbot"] == chatbot.name), self.runs)
-
-            # Query multiple times and store the results
-            run = 0
-            error_count = 0
-            while run < self.runs - prompt_runs:
-                try:
+            # Responses already recorded for this chatbot and prompt in both temp and output files
+            prompt_runs = min(temp_counts[prompt], self.runs) + min(results_counts[prompt], self.runs)
+            for _ in range(self.runs - prompt_runs):
+                tasks.append(self._run_one(chatbot, prompt, temperature, semaphore, queue, error_state))
+        try:
+            # Run all tasks to completion, logging failures so one bad run cannot abort the rest
+            for error in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(error, Exception):
+                    self._log_error(error, chatbot)
+        finally:
+            # Flush queued results and stop the writer, even if the tasks were cancelled
+            await queue.join()
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+
+            # Close progress bar
+            progress_bar.close()
+
+    async def _write_results(self, temp_filename: str, queue: asyncio.Queue, progress_bar, chatbot: _Chatbot) -> None:
+        """Append queued results to the temp file in arrival order."""
+        while True:
+            result = await queue.get()
+            try:
+                with open(temp_filename, "ab") as f:
+                    f.write(orjson.dumps(result) + b"\n")
+                progress_bar.update(1)
+            except Exception as ex:
+                # Log and keep writing so a failed append cannot hang the queue
+                self._log_error(ex, chatbot)
+            finally:
+                queue.task_done()
+
+    async def _run_one(self, chatbot: _Chatbot, prompt: str, temperature, semaphore: asyncio.Semaphore, queue: asyncio.Queue, error_state: dict) -> None:
+        """Perform a single run of a prompt against the chatbot, retrying until it succeeds."""
+        while True:
+            try:
+                async with semaphore:
                     # Rate limit if using unofficial API
                     if isinstance(chatbot, _UnofficialChatbot):
-                        time.sleep(random.uniform(15, 45))
+                        await asyncio.sleep(random.uniform(15, 45))
 
                     # Rate limit if a certain number of unhandled errors have occurred in a row
-                    if error_count >= self.max_errors:
-                        waiting_time = min(error_count - self.max_errors + 1, 10) * random.uniform(55, 65)
-                        self._log_error(f"{error_count} unhandled errors have occurred in a row, waiting {round(waiting_time / 60)}m.", chatbot)
-                        time.sleep(waiting_time)
-
-                    # Perform query and store in temp results
-                    temp_results.append({
-                        "timestamp": time.time(),
-                        "chatbot": chatbot.name,
-                        "prompt": prompt,
-                        "temperature": chatbot.temperature_to_string() if type(chatbot.temperature) == EdgeGPT.ConversationStyle else chatbot.temperature,
-                        "response": chatbot.query(prompt)
-                    })
-
-                    # Save temp results
-                    with open(temp_filename, "w") as f:
-                        f.write(json.dumps(temp_results))
-
-                    # Run is successful, so update progress bar, run count and error count
-                    progress_bar.update(1)
-                    run += 1
-                    error_count = 0
-
-                except asyncio.TimeoutError as ex:
-                    self._log_error(ex, chatbot)
-                    error_count += 1
-                    continue
-
-                except RuntimeError as ex:
-                    self._log_error(ex, chatbot)
-                    error_count += 1
-                    continue
-                
-                except Exception as ex:
-                    self._log_error(ex, chatbot)
-
-                    # Rate limit by a second if the error is related to rate limiting
-                    if isinstance(chatbot, OpenAI) and type(ex.args[0]) is str and "Rate limit reached" in ex.args[0]:
-                        time.sleep(1)
-                    elif isinstance(chatbot, HuggingFace) and type(ex.args[0]) is str and "Model is overloaded" in ex.args[0]:
-                        time.sleep(1)
-
-                    # Immediately kill the cookie file if the error is related to it
-                    elif isinstance(chatbot, Gemini) and type(ex.args[0]) is str and "SNlM0e value not found" in ex.args[0]:
-                        chatbot.kill_cookie_file()
-                    elif isinstance(chatbot, Copilot) and type(ex.args[0]) is str and ("CaptchaChallenge" in ex.args[0] or "Authentication failed" in ex.args[0]):
-                        chatbot.kill_cookie_file()
-
-                    # Otherwise, treat as unhandled error
+                    if error_state["count"] >= self.max_errors:
+                        waiting_time = min(error_state["count"] - self.max_errors + 1, 10) * random.uniform(55, 65)
+                        self._log_error(f"{error_state['count']} unhandled errors have occurred in a row, waiting {round(waiting_time / 60)}m.", chatbot)
+                        await asyncio.sleep(waiting_time)
+
+                    # Perform query without blocking the event loop
+                    if hasattr(chatbot, "aquery"):
+                        response = await chatbot.aquery(prompt)
                     else:
-                        error_count += 1
+                        response = await asyncio.to_thread(chatbot.query, prompt)
+
+                # Run is successful, so queue the result for the writer and reset the error count
+                await queue.put({
+                    "timestamp": time.time(),
+                    "chatbot": chatbot.name,
+                    "prompt": prompt,
+                    "temperature": temperature,
+                    "response": response
+                })
+                error_state["count"] = 0
+                return
+
+            except asyncio.TimeoutError as ex:
+                self._log_error(ex, chatbot)
+                error_state["count"] += 1
+                continue
+
+            except RuntimeError as ex:
+                self._log_error(ex, chatbot)
+                error_state["count"] += 1
+                continue
+
+            except Exception as ex:
+                self._log_error(ex, chatbot)
+
+                error = ex.args[0] if ex.args and type(ex.args[0]) is str else ""
+
+                # Rate limit by a second if the error is related to rate limiting
+                if isinstance(chatbot, OpenAI) and "Rate limit reached" in error:
+                    await asyncio.sleep(1)
+                elif isinstance(chatbot, HuggingFace) and "Model is overloaded" in error:
+                    await asyncio.sleep(1)
+
+                # Immediately kill the cookie file if the error is related to it
+                elif (isinstance(chatbot, Gemini) and "SNlM0e value not found" in error) or (isinstance(chatbot, Copilot) and ("CaptchaChallenge" in error or "Authentication failed" in error)):
+                    # Treat running out of cookie files as an unhandled error rather than aborting the sweep
+                    try:
+                        chatbot.kill_cookie_file()
+                    except Exception as kill_ex:
+                        self._log_error(kill_ex, chatbot)
+                        error_state["count"] += 1
 
-                    continue
+                # Otherwise, treat as unhandled error
+                else:
+                    error_state["count"] += 1
 
-        # Close progress bar
-        progress_bar.close()
+                continue
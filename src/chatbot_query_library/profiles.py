@@ -16,23 +16,16 @@ class ProfileGenerator:
 
     def _dict_to_string(self, _dict: dict) -> str:
         """Convert a dictionary to a formatted string."""
-        string = ""
-
-        # For each entry in dict, generate string as key: value
-        for key in _dict:
-            string += str(key) + ": " + str(_dict[key]) + "\n"
-        string += "\n"
-
-        return string
+        # Generate each entry as key: value and join in a single pass
+        return "".join(f"{key}: {value}\n" for key, value in _dict.items()) + "\n"
 
     def generate_prompts(self) -> list:
         """Generate prompts by combining profiles and questions."""
         prompts = []
 
-        # For each profile and questions, generate a prompt
+        # For each profile, build its string once and combine it with each question
         for profile in self.profiles:
             string = self._dict_to_string(profile)
-            for question in self.questions:
-                prompts.append(string + question)
+            prompts.extend(string + question for question in self.questions)
 
         return prompts